@@ -1,53 +1,62 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 from google.adk.agents import LlmAgent
 from google.adk.tools import agent_tool
 from google.adk.tools.google_search_tool import GoogleSearchTool
 from google.adk.tools import url_context
 from google.adk.tools.mcp_tool import McpToolset
-from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams, StreamableHTTPConnectionParams
 from mcp import StdioServerParameters
 
 # Load environment variables
 load_dotenv()
 
+# Set to "false" to leave out the web research sub-agents entirely
+_web_research_enabled = os.getenv('AGENT_WEB_RESEARCH', 'true').lower() != 'false'
+
 # Get the absolute path to the MCP server
 _current_dir = os.path.dirname(os.path.abspath(__file__))
 _mcp_server_path = os.path.join(_current_dir, '..', 'github-mcp-server', 'server.py')
 
-# Sub-agent for web search
-google_search_agent = LlmAgent(
-    name='google_search_agent',
-    model='gemini-2.5-flash',
-    description='Agent specialized in performing Google searches.',
-    sub_agents=[],
-    instruction='Use the GoogleSearchTool to find information on the web.',
-    tools=[GoogleSearchTool()],
+# Settings passed through to a stdio-spawned MCP server (it doesn't inherit the worker's environment)
+_MCP_SERVER_ENV = (
+    'GITHUB_APP_ID',
+    'GITHUB_PRIVATE_KEY',
+    'GITHUB_INSTALLATION_ID',
+    'GITHUB_TOOLS_BACKEND',
+    'GH_CONCURRENCY',
+    'GITHUB_CACHE_TTL',
+    'GITHUB_CACHE_SIZE',
+    'GITHUB_POOL_SIZE',
+    'GITHUB_TOKEN_CACHE_SIZE',
 )
 
-# Sub-agent for URL content fetching
-url_context_agent = LlmAgent(
-    name='url_context_agent',
-    model='gemini-2.5-flash',
-    description='Agent specialized in fetching content from URLs.',
-    sub_agents=[],
-    instruction='Use the UrlContextTool to retrieve content from provided URLs.',
-    tools=[url_context],
-)
+# Connect to a running MCP server over HTTP if configured, otherwise spawn it over stdio
+_mcp_server_url = os.getenv('MCP_SERVER_URL')
+if _mcp_server_url:
+    _mcp_connection_params = StreamableHTTPConnectionParams(
+        url=_mcp_server_url,
+        headers={'Authorization': f"Bearer {os.getenv('MCP_AUTH_TOKEN', '')}"},
+        timeout=30,
+    )
+else:
+    _mcp_connection_params = StdioConnectionParams(
+        server_params=StdioServerParameters(
+            command='python',
+            args=[_mcp_server_path],
+            env={name: os.environ[name] for name in _MCP_SERVER_ENV if name in os.environ},
+        ),
+        timeout=30,
+    )
 
-# Main agent with GitHub capabilities via MCP
-root_agent = LlmAgent(
-    name='SimpleGitHubAgent',
-    model='gemini-2.5-flash',
-    description='AI agent that helps with GitHub tasks by creating branches, modifying files, and creating pull requests.',
-    sub_agents=[],
-    instruction="""You are SimpleGitHubAgent, an AI assistant that helps developers with GitHub tasks.
+_INSTRUCTION = """You are SimpleGitHubAgent, an AI assistant that helps developers with GitHub tasks.
 
 When a user asks you to work on an issue, follow these steps:
-1. Use get_issue to understand the issue details
-2. Use list_files and read_file to explore the repository
+1. Use bootstrap_context to get the issue details and the repository's top-level files in one call
+2. Use list_files and read_files to explore the repository further (read_files fetches several files in one call; read_file for a single file)
 3. Create a new branch using create_branch with a descriptive name (e.g., "feature/add-login-button")
-4. Make necessary file changes using update_file
+4. Make necessary file changes using commit_files, putting all changed files in one commit (use update_file only for a single file)
 5. Create a pull request using create_pull_request
 
 IMPORTANT: If the user just wants a simple response (like "ping/pong"), just respond with text - don't create branches or PRs.
@@ -56,35 +65,86 @@ Always:
 - Use clear, descriptive branch names
 - Write meaningful commit messages
 - Include "Fixes #<issue_number>" in PR descriptions
-- Explain what you're doing at each step
+- Explain what you're doing at each step"""
+
+_RESEARCH_INSTRUCTION = "\n\nYou have access to web search and URL fetching for research when needed."
+
+
+@lru_cache(maxsize=None)
+def get_google_search_agent() -> LlmAgent:
+    """Sub-agent for web search."""
+    return LlmAgent(
+        name='google_search_agent',
+        model='gemini-2.5-flash',
+        description='Agent specialized in performing Google searches.',
+        sub_agents=[],
+        instruction='Use the GoogleSearchTool to find information on the web.',
+        tools=[GoogleSearchTool()],
+    )
+
 
-You have access to web search and URL fetching for research when needed.""",
-    tools=[
+@lru_cache(maxsize=None)
+def get_url_context_agent() -> LlmAgent:
+    """Sub-agent for URL content fetching."""
+    return LlmAgent(
+        name='url_context_agent',
+        model='gemini-2.5-flash',
+        description='Agent specialized in fetching content from URLs.',
+        sub_agents=[],
+        instruction='Use the UrlContextTool to retrieve content from provided URLs.',
+        tools=[url_context],
+    )
+
+
+@lru_cache(maxsize=None)
+def get_root_agent() -> LlmAgent:
+    """Main agent with GitHub capabilities via MCP, built on first use."""
+    tools = [
         # GitHub MCP Toolset
         McpToolset(
-            connection_params=StdioConnectionParams(
-                server_params=StdioServerParameters(
-                    command='python',
-                    args=[_mcp_server_path],
-                    env={
-                        'GITHUB_APP_ID': os.getenv('GITHUB_APP_ID'),
-                        'GITHUB_PRIVATE_KEY': os.getenv('GITHUB_PRIVATE_KEY'),
-                        'GITHUB_INSTALLATION_ID': os.getenv('GITHUB_INSTALLATION_ID'),
-                    }
-                ),
-                timeout=30,
-            ),
+            connection_params=_mcp_connection_params,
             tool_filter=[
                 'read_file',
+                'read_files',
                 'list_files',
                 'create_branch',
                 'update_file',
+                'commit_files',
                 'create_pull_request',
                 'get_issue',
+                'bootstrap_context',
             ],
         ),
+    ]
+    instruction = _INSTRUCTION
+    
+    if _web_research_enabled:
         # Sub-agents for web research
-        agent_tool.AgentTool(agent=google_search_agent),
-        agent_tool.AgentTool(agent=url_context_agent),
-    ],
-)
+        tools += [
+            agent_tool.AgentTool(agent=get_google_search_agent()),
+            agent_tool.AgentTool(agent=get_url_context_agent()),
+        ]
+        instruction += _RESEARCH_INSTRUCTION
+    
+    return LlmAgent(
+        name='SimpleGitHubAgent',
+        model='gemini-2.5-flash',
+        description='AI agent that helps with GitHub tasks by creating branches, modifying files, and creating pull requests.',
+        sub_agents=[],
+        instruction=instruction,
+        tools=tools,
+    )
+
+
+_LAZY_AGENTS = {
+    'root_agent': get_root_agent,
+    'google_search_agent': get_google_search_agent,
+    'url_context_agent': get_url_context_agent,
+}
+
+
+def __getattr__(name):
+    """Build module-level agents (e.g. `root_agent` for the ADK CLI) on first access."""
+    if name in _LAZY_AGENTS:
+        return _LAZY_AGENTS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
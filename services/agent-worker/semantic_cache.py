@@ -0,0 +1,101 @@
+"""Semantic cache that reuses agent responses for near-identical requests."""
+import logging
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Embedding-based response cache, scoped per repository.
+
+    Requires the optional `sentence-transformers` and `numpy` packages. Only
+    enable it for workloads where paraphrased requests really should share
+    one answer, since a hit skips the agent run entirely.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        ttl: float = 300,
+        max_entries: int = 10000,
+        model_name: str = "all-MiniLM-L6-v2"
+    ):
+        import numpy as np
+        from sentence_transformers import SentenceTransformer
+
+        self._np = np
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.model = SentenceTransformer(model_name)
+
+        # One normalized embedding per row, with parallel metadata lists
+        dim = self.model.get_sentence_embedding_dimension()
+        self._emb_matrix = np.empty((0, dim), dtype=np.float32)
+        self._repos: List[str] = []
+        self._entries: List[tuple[str, float]] = []
+        # lookup/add run in worker threads concurrently; the matrix and lists must change together
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str):
+        """Embed a single text as a normalized float32 row."""
+        return self.model.encode([text], normalize_embeddings=True).astype(self._np.float32)
+
+    def _expire(self) -> None:
+        """Drop entries older than the TTL (rows are in insertion order); caller holds the lock."""
+        now = time.time()
+        expired = 0
+        for _, cached_at in self._entries:
+            if now - cached_at < self.ttl:
+                break
+            expired += 1
+
+        if expired:
+            self._emb_matrix = self._emb_matrix[expired:]
+            del self._repos[:expired]
+            del self._entries[:expired]
+
+    def lookup(self, repo_name: str, text: str) -> Optional[str]:
+        """Return a cached response for a similar request in the same repository."""
+        if not self._entries:
+            return None
+
+        # Embedding is the slow part and touches no shared state, so do it unlocked
+        q = self._embed(text)
+
+        with self._lock:
+            self._expire()
+            emb_matrix, repos, entries = self._emb_matrix, self._repos, self._entries
+            if not entries:
+                return None
+
+            sims = (emb_matrix @ q.T).ravel()
+
+            # Only compare against requests for the same repository
+            mask = self._np.fromiter((r == repo_name for r in repos), dtype=bool, count=len(repos))
+            if not mask.any():
+                return None
+            sims[~mask] = -1.0
+
+            best = int(sims.argmax())
+            if sims[best] > self.threshold:
+                logger.info(f"Semantic cache hit (similarity {sims[best]:.3f})")
+                return entries[best][0]
+            return None
+
+    def add(self, repo_name: str, text: str, response_text: str) -> None:
+        """Store a response for future similar requests."""
+        embedding = self._embed(text)
+
+        with self._lock:
+            self._emb_matrix = self._np.vstack([self._emb_matrix, embedding])
+            self._repos.append(repo_name)
+            self._entries.append((response_text, time.time()))
+
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._emb_matrix = self._emb_matrix[overflow:]
+                del self._repos[:overflow]
+                del self._entries[:overflow]
@@ -3,44 +3,170 @@ import os
 import json
 import logging
 import asyncio
+import hashlib
 import sys
-from typing import Dict, Any
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
 from github import Github
 from google.adk.runners import InMemoryRunner
+from google.adk.tools.mcp_tool import McpToolset
 from google.genai import types
 
-# Add paths
+from shared.queue import get_queue
+
+# GitHub App auth lives with the MCP server
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'github-mcp-server'))
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 from auth import GitHubAppAuth
-from shared.queue import get_queue
 
-from agent import root_agent
+from agent import get_root_agent
+from semantic_cache import SemanticCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# User prompt sent to the agent. The fixed instructions come first and the
+# per-request details last, so the shared prefix can be reused by prompt caching.
+PROMPT_TEMPLATE = """Please help by:
+1. Getting the issue details to understand what's needed
+2. Analyzing the repository structure
+3. Creating a branch for the work
+4. Making the necessary changes
+5. Creating a pull request
+6. Summarizing what you did
+
+A user @{user} has requested help with issue #{issue_number} in repository {repo_name}.
+
+Command: {command}
+
+Repository: {repo_name}
+Issue: #{issue_number}
+"""
+
+# Exact-match response cache settings (duplicate deliveries, retries, repeated commands)
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+
+# Semantic response cache is opt-in: set a similarity threshold (e.g. 0.92) to enable it
+SEMANTIC_CACHE_THRESHOLD = os.getenv("SEMANTIC_CACHE_THRESHOLD")
+
 
 class AgentWorker:
     """Processes agent requests and posts responses to GitHub."""
     
     def __init__(self):
-        self.agent = root_agent
+        self.agent = get_root_agent()
         self.runner = InMemoryRunner(agent=self.agent, app_name="simplegithubagent")
+        self._mcp_toolsets = [t for t in self.agent.tools if isinstance(t, McpToolset)]
         
         # Initialize GitHub App auth
         self.github_auth = GitHubAppAuth(
             os.getenv("GITHUB_APP_ID"),
             os.getenv("GITHUB_PRIVATE_KEY")
         )
+        
+        # Blocking PyGithub calls run here so they don't stall the event loop
+        self._executor = ThreadPoolExecutor(max_workers=int(os.getenv("GITHUB_EXECUTOR_WORKERS", "8")))
+        
+        # Response cache: key -> (response_text, cached_at), kept in LRU order
+        self._response_cache: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._response_locks: Dict[str, asyncio.Lock] = {}
+        # key -> requests holding or waiting on its lock; the lock is dropped when this reaches 0
+        self._response_lock_users: Dict[str, int] = {}
+        
+        self._semantic_cache: Optional[SemanticCache] = None
+        if SEMANTIC_CACHE_THRESHOLD:
+            self._semantic_cache = SemanticCache(
+                threshold=float(SEMANTIC_CACHE_THRESHOLD),
+                ttl=RESPONSE_CACHE_TTL
+            )
+            logger.info(f"Semantic cache enabled (threshold {SEMANTIC_CACHE_THRESHOLD})")
+    
+    async def start(self) -> None:
+        """Start the MCP server session up front so the first request doesn't pay for it."""
+        start_time = time.perf_counter()
+        for toolset in self._mcp_toolsets:
+            await toolset.get_tools()
+        logger.info(f"MCP toolsets ready in {time.perf_counter() - start_time:.2f}s")
+    
+    async def close(self) -> None:
+        """Shut down the MCP server sessions and the GitHub thread pool."""
+        for toolset in self._mcp_toolsets:
+            try:
+                await toolset.close()
+            except Exception as e:
+                logger.warning(f"Failed to close MCP toolset: {e}")
+        self._executor.shutdown(wait=True)
+    
+    async def _run_blocking(self, func, *args):
+        """Run a blocking call on the worker's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
     
     def _get_github_client(self, installation_id: int = None) -> Github:
         """Get authenticated GitHub client using App auth."""
         if not installation_id:
             installation_id = int(os.getenv("GITHUB_INSTALLATION_ID"))
         
-        token = self.github_auth.get_installation_token(installation_id)
-        return Github(token)
+        return self.github_auth.get_github_client(installation_id)
+    
+    @staticmethod
+    def _cache_key(repo_name: str, issue_number: int, command: str) -> str:
+        """Build the response cache key for a request."""
+        return hashlib.sha256(f"{repo_name}|{issue_number}|{command}".encode()).hexdigest()
+    
+    def _get_cached_response(self, key: str) -> Optional[str]:
+        """Return a cached response if it is still fresh."""
+        entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        
+        response_text, cached_at = entry
+        if time.time() - cached_at >= RESPONSE_CACHE_TTL:
+            del self._response_cache[key]
+            return None
+        
+        self._response_cache.move_to_end(key)
+        return response_text
+    
+    def _cache_response(self, key: str, response_text: str) -> None:
+        """Store a response, evicting the least recently used entries."""
+        self._response_cache[key] = (response_text, time.time())
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+    
+    def _get_issue_text(self, repo_name: str, issue_number: int, command: str, installation_id: int = None) -> str:
+        """Build the text used to match semantically similar requests."""
+        gh = self._get_github_client(installation_id)
+        issue = gh.get_repo(repo_name).get_issue(issue_number)
+        return f"{command}\n{issue.title}\n{issue.body or ''}"
+    
+    async def _run_agent(self, prompt: str, user: str, session_id: str) -> str:
+        """Run the agent on a prompt and return its final response."""
+        await self.runner.session_service.create_session(
+            app_name="simplegithubagent",
+            user_id=user,
+            session_id=session_id
+        )
+        
+        logger.info("Running agent...")
+        parts = []
+        
+        async for event in self.runner.run_async(
+            user_id=user,
+            session_id=session_id,
+            new_message=types.Content(role="user", parts=[types.Part(text=prompt)])
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                text = event.content.parts[0].text
+                if text:
+                    parts.append(text)
+        
+        # Join and strip once instead of re-stripping on every final event
+        return "\n\n".join(parts).strip()
     
     async def process_request_async(self, request_data: Dict[str, Any]) -> None:
         """Process an agent request asynchronously."""
@@ -55,46 +181,54 @@ class AgentWorker:
             logger.info(f"Command: {command}")
             
             # Build prompt for agent
-            prompt = f"""A user @{user} has requested help with issue #{issue_number} in repository {repo_name}.
-
-Command: {command}
-
-Please help by:
-1. Getting the issue details to understand what's needed
-2. Analyzing the repository structure
-3. Creating a branch for the work
-4. Making the necessary changes
-5. Creating a pull request
-6. Summarizing what you did
-
-Repository: {repo_name}
-Issue: #{issue_number}
-"""
-            
-            # Create session
-            session_id = f"{repo_name.replace('/', '_')}_{issue_number}"
-            await self.runner.session_service.create_session(
-                app_name="simplegithubagent",
-                user_id=user,
-                session_id=session_id
+            prompt = PROMPT_TEMPLATE.format(
+                user=user,
+                issue_number=issue_number,
+                repo_name=repo_name,
+                command=command
             )
             
-            # Run agent
-            logger.info("Running agent...")
-            response_text = ""
+            # Unique per run: concurrent commands on the same issue must not share a session
+            session_id = f"{repo_name.replace('/', '_')}_{issue_number}_{uuid.uuid4().hex}"
             
-            async for event in self.runner.run_async(
-                user_id=user,
-                session_id=session_id,
-                new_message=types.Content(role="user", parts=[types.Part(text=prompt)])
-            ):
-                if event.is_final_response():
-                    response_text = event.content.parts[0].text.strip()
+            # Serialize identical requests so racing duplicates share one agent run
+            key = self._cache_key(repo_name, issue_number, command)
+            lock = self._response_locks.setdefault(key, asyncio.Lock())
+            self._response_lock_users[key] = self._response_lock_users.get(key, 0) + 1
+            try:
+                async with lock:
+                    response_text = self._get_cached_response(key)
+                    if response_text is not None:
+                        logger.info("Using cached agent response")
+                    else:
+                        semantic_text = None
+                        if self._semantic_cache:
+                            semantic_text = await self._run_blocking(
+                                self._get_issue_text, repo_name, issue_number, command, installation_id
+                            )
+                            response_text = await asyncio.to_thread(self._semantic_cache.lookup, repo_name, semantic_text)
+                        
+                        if response_text is None:
+                            response_text = await self._run_agent(prompt, user, session_id)
+                            if semantic_text is not None:
+                                await asyncio.to_thread(self._semantic_cache.add, repo_name, semantic_text, response_text)
+                        self._cache_response(key, response_text)
+            finally:
+                # Drop the lock once nobody holds or waits on it, even if the run failed
+                # (lock.locked() is already False while a woken waiter is still queued)
+                users = self._response_lock_users[key] - 1
+                if users:
+                    self._response_lock_users[key] = users
+                else:
+                    del self._response_lock_users[key]
+                    del self._response_locks[key]
             
             logger.info(f"Agent response: {response_text[:200]}...")
             
             # Post response to GitHub using App auth
-            self._post_comment(repo_name, issue_number, f"🤖 **SimpleGitHubAgent Response**\n\n{response_text}", installation_id)
+            await self._run_blocking(
+                self._post_comment, repo_name, issue_number, f"🤖 **SimpleGitHubAgent Response**\n\n{response_text}", installation_id
+            )
             
             logger.info("Request processed successfully")
             
@@ -103,7 +237,8 @@ Issue: #{issue_number}
             # Try to post error to GitHub
             try:
                 error_msg = f"❌ Error processing request: {str(e)}"
-                self._post_comment(
+                await self._run_blocking(
+                    self._post_comment,
                     request_data["repository"],
                     request_data["issue_number"],
                     error_msg,
@@ -112,10 +247,6 @@ Issue: #{issue_number}
             except:
                 pass
     
-    def process_request(self, request_data: Dict[str, Any]) -> None:
-        """Process an agent request (sync wrapper)."""
-        asyncio.run(self.process_request_async(request_data))
-    
     def _post_comment(self, repo_name: str, issue_number: int, comment: str, installation_id: int = None) -> None:
         """Post a comment to a GitHub issue using GitHub App auth."""
         try:
@@ -134,18 +265,43 @@ def main():
     
     worker = AgentWorker()
     queue = get_queue()
+    concurrency = int(os.getenv("AGENT_CONCURRENCY", "8"))
+    sem = asyncio.Semaphore(concurrency)
+    tasks: set[asyncio.Task] = set()
     
     async def process_message(message: Dict[str, Any]):
-        """Process a message from the queue."""
-        await worker.process_request_async(message)
+        """Dispatch a message from the queue without blocking the subscriber."""
+        # Wait for a free slot so the queue isn't drained faster than we can work
+        await sem.acquire()
+        task = asyncio.create_task(worker.process_request_async(message))
+        tasks.add(task)
+        
+        def _done(t: asyncio.Task) -> None:
+            tasks.discard(t)
+            sem.release()
+        
+        task.add_done_callback(_done)
     
     async def run():
+        logger.info(f"Event loop: {type(asyncio.get_running_loop()).__name__}")
+        logger.info(f"Processing up to {concurrency} requests concurrently")
         try:
+            await worker.start()
             await queue.subscribe(process_message)
         except KeyboardInterrupt:
             logger.info("Shutting down...")
         finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
             await queue.close()
+            await worker.close()
+    
+    # Use uvloop when available; falls back to the default loop (e.g. on Windows)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     
     asyncio.run(run())
 
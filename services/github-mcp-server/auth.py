@@ -1,10 +1,30 @@
 """GitHub App authentication management."""
+import threading
 import time
 import jwt
-from typing import Dict
-from github import Github, Auth
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+from collections import OrderedDict
+from typing import Any, List, Optional
+from github import Github, GithubIntegration, Auth
 import os
 
+# Connections kept open per client (urllib3 pool)
+GITHUB_POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "20"))
+
+# Installations whose tokens and clients are kept; the least recently used beyond this are dropped
+TOKEN_CACHE_SIZE = int(os.getenv("GITHUB_TOKEN_CACHE_SIZE", "64"))
+
+
+class _CachedJWTAppAuth(Auth.AppAuth):
+    """PyGithub App auth that signs requests with GitHubAppAuth's cached JWT."""
+    
+    def __init__(self, app_auth: "GitHubAppAuth"):
+        super().__init__(app_auth.app_id, app_auth.private_key)
+        self._app_auth = app_auth
+    
+    def create_jwt(self, expiration: Optional[int] = None) -> str:
+        return self._app_auth.generate_jwt()
+
 
 class GitHubAppAuth:
     """Manages GitHub App authentication and token generation."""
@@ -12,42 +32,124 @@ class GitHubAppAuth:
     def __init__(self, app_id: str, private_key: str):
         self.app_id = app_id
         self.private_key = private_key
-        self._installation_tokens: Dict[int, tuple[str, float]] = {}
+        # Installation ID -> (token, expires_at), in LRU order
+        self._installation_tokens: "OrderedDict[int, tuple[str, float]]" = OrderedDict()
+        # One lock per installation so concurrent callers share a single refresh (LRU, like the tokens)
+        self._token_locks: "OrderedDict[int, threading.Lock]" = OrderedDict()
+        self._jwt_cache: Optional[tuple[str, float]] = None
+        # Installation ID -> (token, client); reused while the token is unchanged
+        self._clients: "OrderedDict[int, tuple[str, Github]]" = OrderedDict()
+        self._lru_lock = threading.Lock()
+        self._signing_key = None
+        self._integration: Optional[GithubIntegration] = None
+    
+    def _get_signing_key(self):
+        """Parse the PEM private key once and reuse the key object for signing."""
+        if self._signing_key is None:
+            pem = self.private_key.encode() if isinstance(self.private_key, str) else self.private_key
+            self._signing_key = load_pem_private_key(pem, password=None)
+        return self._signing_key
     
     def generate_jwt(self) -> str:
-        """Generate a JWT for GitHub App authentication."""
+        """Generate a JWT for GitHub App authentication, reusing a cached one if still valid."""
         now = int(time.time())
+        
+        # Reuse the signed JWT until it's within a minute of expiring
+        if self._jwt_cache is not None:
+            token, expires_at = self._jwt_cache
+            if expires_at - now > 60:
+                return token
+        
+        expires_at = now + (10 * 60)  # Expiration time (10 minutes)
         payload = {
             'iat': now - 60,  # Issued at time (60 seconds in the past to account for clock drift)
-            'exp': now + (10 * 60),  # Expiration time (10 minutes)
+            'exp': expires_at,
             'iss': self.app_id
         }
         
-        token = jwt.encode(payload, self.private_key, algorithm='RS256')
+        token = jwt.encode(payload, self._get_signing_key(), algorithm='RS256')
+        self._jwt_cache = (token, expires_at)
         return token
     
-    def get_installation_token(self, installation_id: int) -> str:
-        """Get an installation access token, using cache if valid."""
-        # Check cache
-        if installation_id in self._installation_tokens:
-            token, expires_at = self._installation_tokens[installation_id]
+    def _lru_get(self, cache: OrderedDict, key: int):
+        """Look up an LRU cache entry, marking it most recently used."""
+        with self._lru_lock:
+            entry = cache.get(key)
+            if entry is not None:
+                cache.move_to_end(key)
+            return entry
+    
+    def _lru_set(self, cache: OrderedDict, key: int, value) -> List[Any]:
+        """Store an LRU cache entry, evicting the least recently used past TOKEN_CACHE_SIZE.
+        
+        Returns the values that were replaced or evicted.
+        """
+        with self._lru_lock:
+            displaced = []
+            previous = cache.get(key)
+            if previous is not None:
+                displaced.append(previous)
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > TOKEN_CACHE_SIZE:
+                displaced.append(cache.popitem(last=False)[1])
+            return displaced
+    
+    def _get_token_lock(self, installation_id: int) -> threading.Lock:
+        """Get the refresh lock for an installation, creating it on first use."""
+        with self._lru_lock:
+            lock = self._token_locks.get(installation_id)
+            if lock is None:
+                lock = self._token_locks[installation_id] = threading.Lock()
+            self._token_locks.move_to_end(installation_id)
+            while len(self._token_locks) > TOKEN_CACHE_SIZE:
+                self._token_locks.popitem(last=False)
+            return lock
+    
+    def _get_cached_token(self, installation_id: int) -> Optional[str]:
+        """Return the cached installation token if it's still valid."""
+        entry = self._lru_get(self._installation_tokens, installation_id)
+        if entry is not None:
+            token, expires_at = entry
             # If token expires in more than 5 minutes, use it
             if expires_at - time.time() > 300:
                 return token
+        return None
+    
+    def get_installation_token(self, installation_id: int) -> str:
+        """Get an installation access token, using cache if valid."""
+        # Check cache
+        token = self._get_cached_token(installation_id)
+        if token:
+            return token
         
-        # Generate new token using PyGithub's App authentication
-        from github import GithubIntegration
-        
-        integration = GithubIntegration(self.app_id, self.private_key)
-        auth = integration.get_access_token(installation_id)
-        
-        # Cache token (expires in 1 hour, cache for 55 minutes)
-        expires_at = time.time() + (55 * 60)
-        self._installation_tokens[installation_id] = (auth.token, expires_at)
-        
-        return auth.token
+        with self._get_token_lock(installation_id):
+            # Another thread may have refreshed the token while we waited
+            token = self._get_cached_token(installation_id)
+            if token:
+                return token
+            
+            # Generate new token using PyGithub's App authentication (built once, signs with the cached JWT)
+            if self._integration is None:
+                self._integration = GithubIntegration(auth=_CachedJWTAppAuth(self))
+            auth = self._integration.get_access_token(installation_id)
+            
+            # Cache token until GitHub's reported expiry (tokens last 1 hour)
+            expires_at = auth.expires_at.timestamp() if auth.expires_at else time.time() + (60 * 60)
+            self._lru_set(self._installation_tokens, installation_id, (auth.token, expires_at))
+            
+            return auth.token
     
     def get_github_client(self, installation_id: int) -> Github:
-        """Get an authenticated GitHub client for an installation."""
+        """Get an authenticated GitHub client for an installation, reusing its connection pool."""
         token = self.get_installation_token(installation_id)
-        return Github(token)
+        
+        cached = self._lru_get(self._clients, installation_id)
+        if cached is not None and cached[0] == token:
+            return cached[1]
+        
+        client = Github(auth=Auth.Token(token), pool_size=GITHUB_POOL_SIZE)
+        # Release the connection pools of clients for a stale token or an evicted installation
+        for _, old_client in self._lru_set(self._clients, installation_id, (token, client)):
+            old_client.close()
+        return client
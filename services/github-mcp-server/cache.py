@@ -0,0 +1,46 @@
+"""In-process cache for GitHub API read responses."""
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class ResponseCache:
+    """LRU cache of GitHub read responses, revalidated with ETags once stale.
+
+    Keys are tuples whose first element is the repository full name, so all
+    entries for a repository can be dropped after a write.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (payload, etag, fetched_at)
+        self._entries: "OrderedDict[Tuple, tuple[Any, Optional[str], float]]" = OrderedDict()
+
+    def get(self, key: Tuple) -> Optional[tuple[Any, Optional[str], bool]]:
+        """Return (payload, etag, is_fresh) for a key, or None if not cached."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        self._entries.move_to_end(key)
+        payload, etag, fetched_at = entry
+        return payload, etag, time.time() - fetched_at < self.ttl
+
+    def set(self, key: Tuple, payload: Any, etag: Optional[str]) -> None:
+        """Store a response, evicting the least recently used entries."""
+        self._entries[key] = (payload, etag, time.time())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def refresh(self, key: Tuple) -> None:
+        """Mark a cached response as fresh again (after a 304 Not Modified)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries[key] = (entry[0], entry[1], time.time())
+
+    def invalidate_repo(self, repo: str) -> None:
+        """Drop every cached response for a repository."""
+        for key in [k for k in self._entries if k[0] == repo]:
+            del self._entries[key]
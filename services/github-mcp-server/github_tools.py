@@ -1,26 +1,43 @@
 """GitHub API tool implementations."""
 from typing import Optional, List, Dict, Any
-from github import Github, GithubException
+from github import Github, GithubException, InputGitTreeElement
 from github.Repository import Repository
 from github.ContentFile import ContentFile
-import base64
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Longest issue body returned to the agent; every extra byte becomes prompt tokens
+MAX_ISSUE_BODY = 2048
+
+
+def truncate_body(body: Optional[str]) -> str:
+    """Cap an issue body at MAX_ISSUE_BODY characters, marking the cut."""
+    body = body or ""
+    if len(body) > MAX_ISSUE_BODY:
+        body = body[:MAX_ISSUE_BODY] + "…[truncated]"
+    return body
+
 
 class GitHubTools:
-    """GitHub API operations."""
+    """GitHub API operations (synchronous PyGithub backend)."""
     
     def __init__(self, github_client: Github):
         self.gh = github_client
+        self._repo_cache: Dict[str, Repository] = {}
+        # (repo, path, branch) -> blob SHA of the last version we wrote
+        self._sha_cache: Dict[tuple[str, str, str], str] = {}
     
     def _get_repo(self, repo_full_name: str) -> Repository:
-        """Get a repository object."""
-        try:
-            return self.gh.get_repo(repo_full_name)
-        except GithubException as e:
-            raise ValueError(f"Repository '{repo_full_name}' not found or not accessible: {e}")
+        """Get a repository object, reusing it across tool calls."""
+        repository = self._repo_cache.get(repo_full_name)
+        if repository is None:
+            try:
+                repository = self.gh.get_repo(repo_full_name)
+            except GithubException as e:
+                raise ValueError(f"Repository '{repo_full_name}' not found or not accessible: {e}")
+            self._repo_cache[repo_full_name] = repository
+        return repository
     
     def read_file(self, repo: str, path: str, ref: str = "main") -> str:
         """Read a file from a repository."""
@@ -31,17 +48,30 @@ class GitHubTools:
             if isinstance(content_file, list):
                 raise ValueError(f"Path '{path}' is a directory, not a file")
             
-            # Decode content
-            content = base64.b64decode(content_file.content).decode('utf-8')
-            return content
+            # Files over 1 MB come back without content; don't pass that off as an empty file
+            if content_file.encoding == "none":
+                raise ValueError(f"File '{path}' is too large to read ({content_file.size} bytes)")
+            
+            # PyGithub already exposes the base64-decoded bytes
+            return content_file.decoded_content.decode('utf-8')
         except GithubException as e:
             raise ValueError(f"Failed to read file '{path}': {e}")
     
-    def list_files(self, repo: str, path: str = "", ref: str = "main") -> List[Dict[str, Any]]:
-        """List files in a directory."""
+    def read_files(self, repo: str, paths: List[str], ref: str = "main") -> Dict[str, Optional[str]]:
+        """Read several files (None for missing, binary or unreadably large files)."""
+        files = {}
+        for path in paths:
+            try:
+                files[path] = self.read_file(repo, path, ref)
+            except (ValueError, UnicodeDecodeError):
+                files[path] = None
+        return files
+    
+    def list_files(self, repo: str, path: str = "", ref: Optional[str] = "main") -> List[Dict[str, Any]]:
+        """List files in a directory (ref=None uses the default branch)."""
         try:
             repository = self._get_repo(repo)
-            contents = repository.get_contents(path, ref=ref)
+            contents = repository.get_contents(path, ref=ref) if ref else repository.get_contents(path)
             
             if not isinstance(contents, list):
                 contents = [contents]
@@ -53,7 +83,6 @@ class GitHubTools:
                     "path": content.path,
                     "type": content.type,
                     "size": content.size,
-                    "sha": content.sha,
                 })
             
             return files
@@ -92,40 +121,96 @@ class GitHubTools:
         """Create or update a file in a repository."""
         try:
             repository = self._get_repo(repo)
+            cache_key = (repo, path, branch)
             
-            # Try to get existing file
-            try:
-                existing_file = repository.get_contents(path, ref=branch)
-                if isinstance(existing_file, list):
-                    raise ValueError(f"Path '{path}' is a directory")
-                
-                # Update existing file
-                result = repository.update_file(
-                    path=path,
-                    message=message,
-                    content=content,
-                    sha=existing_file.sha,
-                    branch=branch
-                )
-                action = "Updated"
-            except GithubException as e:
-                if e.status == 404:
-                    # Create new file
-                    result = repository.create_file(
+            # Skip the lookup when we already know the file's current SHA
+            sha = sha or self._sha_cache.get(cache_key)
+            result = None
+            if sha:
+                try:
+                    result = repository.update_file(
+                        path=path,
+                        message=message,
+                        content=content,
+                        sha=sha,
+                        branch=branch
+                    )
+                    action = "Updated"
+                except GithubException as e:
+                    # Stale SHA (file changed elsewhere) - fall back to a fresh lookup
+                    if e.status not in (409, 422):
+                        raise
+                    self._sha_cache.pop(cache_key, None)
+            
+            if result is None:
+                # Try to get existing file
+                try:
+                    existing_file = repository.get_contents(path, ref=branch)
+                    if isinstance(existing_file, list):
+                        raise ValueError(f"Path '{path}' is a directory")
+                    
+                    # Update existing file
+                    result = repository.update_file(
                         path=path,
                         message=message,
                         content=content,
+                        sha=existing_file.sha,
                         branch=branch
                     )
-                    action = "Created"
-                else:
-                    raise
+                    action = "Updated"
+                except GithubException as e:
+                    if e.status == 404:
+                        # Create new file
+                        result = repository.create_file(
+                            path=path,
+                            message=message,
+                            content=content,
+                            branch=branch
+                        )
+                        action = "Created"
+                    else:
+                        raise
+            
+            self._sha_cache[cache_key] = result["content"].sha
             
             logger.info(f"{action} file '{path}' in {repo} on branch '{branch}'")
             return f"{action} file '{path}' successfully"
         except GithubException as e:
             raise ValueError(f"Failed to update file '{path}': {e}")
     
+    def commit_files(
+        self,
+        repo: str,
+        branch: str,
+        files: List[Dict[str, str]],
+        message: str
+    ) -> str:
+        """Create or update several files in a single commit."""
+        try:
+            repository = self._get_repo(repo)
+            
+            # Current head of the branch
+            ref = repository.get_git_ref(f"heads/{branch}")
+            parent = repository.get_git_commit(ref.object.sha)
+            
+            # One tree with every change on top of the parent's tree
+            elements = [
+                InputGitTreeElement(path=f["path"], mode="100644", type="blob", content=f["content"])
+                for f in files
+            ]
+            tree = repository.create_git_tree(elements, base_tree=parent.tree)
+            commit = repository.create_git_commit(message, tree, [parent])
+            ref.edit(commit.sha)
+            
+            # Blob SHAs for these paths changed
+            for f in files:
+                self._sha_cache.pop((repo, f["path"], branch), None)
+            
+            logger.info(f"Committed {len(files)} file(s) to {repo} on branch '{branch}'")
+            return f"Committed {len(files)} file(s) in {commit.sha[:7]} successfully"
+        except GithubException as e:
+            raise ValueError(f"Failed to commit files: {e}")
+    
     def create_pull_request(
         self,
         repo: str,
@@ -149,14 +234,12 @@ class GitHubTools:
             return {
                 "number": pr.number,
                 "url": pr.html_url,
-                "title": pr.title,
-                "state": pr.state,
             }
         except GithubException as e:
             raise ValueError(f"Failed to create pull request: {e}")
     
     def get_issue(self, repo: str, issue_number: int) -> Dict[str, Any]:
-        """Get issue details."""
+        """Get issue details along with the repository's default branch."""
         try:
             repository = self._get_repo(repo)
             issue = repository.get_issue(issue_number)
@@ -164,12 +247,19 @@ class GitHubTools:
             return {
                 "number": issue.number,
                 "title": issue.title,
-                "body": issue.body,
+                "body": truncate_body(issue.body),
                 "state": issue.state,
                 "labels": [label.name for label in issue.labels],
                 "user": issue.user.login,
-                "created_at": issue.created_at.isoformat(),
                 "url": issue.html_url,
+                "default_branch": repository.default_branch,
             }
         except GithubException as e:
             raise ValueError(f"Failed to get issue #{issue_number}: {e}")
+    
+    def bootstrap_context(self, repo: str, issue_number: int, ref: Optional[str] = None) -> Dict[str, Any]:
+        """Get issue details and the repository's top-level files."""
+        return {
+            "issue": self.get_issue(repo, issue_number),
+            "files": self.list_files(repo, "", ref),
+        }
@@ -0,0 +1,418 @@
+"""Async GitHub API tool implementations over httpx (HTTP/2)."""
+from typing import Optional, List, Dict, Any
+from binascii import a2b_base64
+from base64 import b64encode
+from urllib.parse import quote
+import asyncio
+import httpx
+import logging
+import os
+
+from cache import ResponseCache
+from github_tools import truncate_body
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = "https://api.github.com"
+
+# Issue (or PR) details plus the repository's default branch in one round trip
+_ISSUE_QUERY = """
+query($owner: String!, $name: String!, $number: Int!) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef { name }
+    issueOrPullRequest(number: $number) {
+      ... on Issue {
+        number title body state url
+        author { login }
+        labels(first: 50) { nodes { name } }
+      }
+      ... on PullRequest {
+        number title body state url
+        author { login }
+        labels(first: 50) { nodes { name } }
+      }
+    }
+  }
+}
+"""
+
+# Fragment selecting one blob's text; aliased once per path in a read_files query
+_BLOB_FIELD = "f{i}: object(expression: $e{i}) {{ ... on Blob {{ text isBinary isTruncated }} }}"
+
+# Read responses shared across AsyncGitHubTools instances; stale entries are revalidated with ETags
+response_cache = ResponseCache(
+    maxsize=int(os.getenv("GITHUB_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("GITHUB_CACHE_TTL", "60"))
+)
+
+# Shared across AsyncGitHubTools instances so every call reuses one HTTP/2 connection pool
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared async HTTP client for the GitHub API."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            base_url=GITHUB_API_URL,
+            http2=True,
+            timeout=30,
+            limits=httpx.Limits(max_keepalive_connections=20),
+            headers={
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            },
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared async HTTP client."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+class AsyncGitHubTools:
+    """GitHub API operations (async httpx backend), mirroring GitHubTools."""
+    
+    def __init__(self, token: str):
+        self._http = get_http_client()
+        self._headers = {"Authorization": f"token {token}"}
+        # (repo, path, branch) -> blob SHA of the last version we wrote
+        self._sha_cache: Dict[tuple[str, str, str], str] = {}
+    
+    async def _request(self, method: str, url: str, error: str, **kwargs: Any) -> httpx.Response:
+        """Send a request, turning transport failures into ValueError."""
+        headers = {**self._headers, **kwargs.pop("headers", {})}
+        try:
+            return await self._http.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            raise ValueError(f"{error}: {e}")
+    
+    async def _json(self, method: str, url: str, error: str, **kwargs: Any) -> Any:
+        """Send a request and return the decoded JSON body, raising on error statuses."""
+        response = await self._request(method, url, error, **kwargs)
+        if response.is_error:
+            raise ValueError(f"{error}: {response.status_code} {response.text}")
+        return response.json()
+    
+    async def _get(self, repo: str, url: str, error: str, **params: Any) -> Any:
+        """GET a REST endpoint and return the decoded JSON body, using the response cache."""
+        params = {k: v for k, v in params.items() if v is not None}
+        key = (repo, url, tuple(sorted(params.items())))
+        
+        cached = response_cache.get(key)
+        headers = {}
+        if cached is not None:
+            payload, etag, fresh = cached
+            if fresh:
+                return payload
+            if etag:
+                headers["If-None-Match"] = etag
+        
+        response = await self._request("GET", url, error, params=params or None, headers=headers)
+        
+        # Not modified: reuse the cached body (doesn't count against the rate limit)
+        if response.status_code == 304 and cached is not None:
+            response_cache.refresh(key)
+            return cached[0]
+        
+        if response.is_error:
+            raise ValueError(f"{error}: {response.status_code} {response.text}")
+        
+        payload = response.json()
+        response_cache.set(key, payload, response.headers.get("ETag"))
+        return payload
+    
+    async def _graphql(self, repo: str, query: str, error: str, **variables: Any) -> Dict[str, Any]:
+        """Run a GraphQL query and return its data, caching it for the cache TTL."""
+        key = (repo, "graphql", query, tuple(sorted(variables.items())))
+        cached = response_cache.get(key)
+        if cached is not None and cached[2]:
+            return cached[0]
+        
+        body = await self._json("POST", "/graphql", error, json={"query": query, "variables": variables})
+        if body.get("errors"):
+            messages = "; ".join(err.get("message", "") for err in body["errors"])
+            raise ValueError(f"{error}: {messages}")
+        
+        # GraphQL responses carry no ETag, so they're only reused while fresh
+        response_cache.set(key, body["data"], None)
+        return body["data"]
+    
+    async def read_file(self, repo: str, path: str, ref: str = "main") -> str:
+        """Read a file from a repository."""
+        content_file = await self._get(
+            repo,
+            f"/repos/{repo}/contents/{quote(path)}",
+            f"Failed to read file '{path}'",
+            ref=ref
+        )
+        
+        if isinstance(content_file, list):
+            raise ValueError(f"Path '{path}' is a directory, not a file")
+        
+        # Files over 1 MB come back without content; don't pass that off as an empty file
+        if content_file.get("encoding") == "none":
+            raise ValueError(f"File '{path}' is too large to read ({content_file.get('size')} bytes)")
+        
+        # Decode content (a2b_base64 skips b64decode's extra validation pass and copy)
+        content = a2b_base64(content_file["content"]).decode('utf-8')
+        return content
+    
+    async def read_files(self, repo: str, paths: List[str], ref: str = "main") -> Dict[str, Optional[str]]:
+        """Read several files in one GraphQL round trip (None for missing, binary or unreadably large files)."""
+        if not paths:
+            return {}
+        owner, _, name = repo.partition("/")
+        expressions = {f"e{i}": f"{ref}:{path}" for i, path in enumerate(paths)}
+        query = "query($owner: String!, $name: String!, {}) {{ repository(owner: $owner, name: $name) {{ {} }} }}".format(
+            ", ".join(f"${var}: String!" for var in expressions),
+            " ".join(_BLOB_FIELD.format(i=i) for i in range(len(paths)))
+        )
+        data = await self._graphql(
+            repo,
+            query,
+            "Failed to read files",
+            owner=owner,
+            name=name,
+            **expressions
+        )
+        
+        repository = data.get("repository")
+        if not repository:
+            raise ValueError(f"Failed to read files: repository '{repo}' not found")
+        
+        files = {}
+        truncated = []
+        for i, path in enumerate(paths):
+            blob = repository.get(f"f{i}")
+            if not blob or blob.get("isBinary"):
+                files[path] = None
+            elif blob.get("isTruncated"):
+                # GraphQL cuts large blobs short; partial text must never pass as the whole file
+                truncated.append(path)
+            else:
+                files[path] = blob["text"]
+        
+        if truncated:
+            contents = await asyncio.gather(
+                *(self.read_file(repo, path, ref) for path in truncated),
+                return_exceptions=True
+            )
+            for path, content in zip(truncated, contents):
+                files[path] = None if isinstance(content, Exception) else content
+        
+        # Keep the caller's order
+        return {path: files[path] for path in paths}
+    
+    async def list_files(self, repo: str, path: str = "", ref: Optional[str] = "main") -> List[Dict[str, Any]]:
+        """List files in a directory (ref=None uses the default branch)."""
+        contents = await self._get(
+            repo,
+            f"/repos/{repo}/contents/{quote(path)}",
+            f"Failed to list files in '{path}'",
+            ref=ref
+        )
+        
+        if not isinstance(contents, list):
+            contents = [contents]
+        
+        files = []
+        for content in contents:
+            files.append({
+                "name": content["name"],
+                "path": content["path"],
+                "type": content["type"],
+                "size": content["size"],
+            })
+        
+        return files
+    
+    async def create_branch(self, repo: str, branch_name: str, from_ref: str = "main") -> str:
+        """Create a new branch."""
+        error = "Failed to create branch"
+        
+        # Get the source branch
+        source = await self._json("GET", f"/repos/{repo}/git/ref/heads/{quote(from_ref)}", error)
+        source_sha = source["object"]["sha"]
+        
+        # Create new branch
+        response = await self._request(
+            "POST",
+            f"/repos/{repo}/git/refs",
+            error,
+            json={"ref": f"refs/heads/{branch_name}", "sha": source_sha}
+        )
+        if response.status_code == 422:
+            raise ValueError(f"Branch '{branch_name}' already exists")
+        if response.is_error:
+            raise ValueError(f"{error}: {response.status_code} {response.text}")
+        
+        response_cache.invalidate_repo(repo)
+        logger.info(f"Created branch '{branch_name}' from '{from_ref}' in {repo}")
+        return f"Successfully created branch '{branch_name}'"
+    
+    async def update_file(
+        self,
+        repo: str,
+        path: str,
+        content: str,
+        message: str,
+        branch: str,
+        sha: Optional[str] = None
+    ) -> str:
+        """Create or update a file in a repository."""
+        error = f"Failed to update file '{path}'"
+        url = f"/repos/{repo}/contents/{quote(path)}"
+        cache_key = (repo, path, branch)
+        body = {
+            "message": message,
+            "content": b64encode(content.encode('utf-8')).decode('ascii'),
+            "branch": branch,
+        }
+        
+        # Skip the lookup when we already know the file's current SHA
+        sha = sha or self._sha_cache.get(cache_key)
+        response = None
+        if sha:
+            response = await self._request("PUT", url, error, json={**body, "sha": sha})
+            # Stale SHA (file changed elsewhere) - fall back to a fresh lookup
+            if response.status_code in (409, 422):
+                self._sha_cache.pop(cache_key, None)
+                response = None
+        
+        if response is None:
+            # Look up the existing file; 404 means we're creating it
+            existing = await self._request("GET", url, error, params={"ref": branch})
+            if existing.status_code == 404:
+                response = await self._request("PUT", url, error, json=body)
+            elif existing.is_error:
+                raise ValueError(f"{error}: {existing.status_code} {existing.text}")
+            else:
+                existing_file = existing.json()
+                if isinstance(existing_file, list):
+                    raise ValueError(f"Path '{path}' is a directory")
+                response = await self._request("PUT", url, error, json={**body, "sha": existing_file["sha"]})
+        
+        if response.is_error:
+            raise ValueError(f"{error}: {response.status_code} {response.text}")
+        
+        # 201 when the file was created, 200 when it was updated
+        action = "Created" if response.status_code == 201 else "Updated"
+        self._sha_cache[cache_key] = response.json()["content"]["sha"]
+        
+        response_cache.invalidate_repo(repo)
+        logger.info(f"{action} file '{path}' in {repo} on branch '{branch}'")
+        return f"{action} file '{path}' successfully"
+    
+    async def commit_files(
+        self,
+        repo: str,
+        branch: str,
+        files: List[Dict[str, str]],
+        message: str
+    ) -> str:
+        """Create or update several files in a single commit."""
+        error = "Failed to commit files"
+        
+        # Current head of the branch
+        ref = await self._json("GET", f"/repos/{repo}/git/ref/heads/{quote(branch)}", error)
+        parent_sha = ref["object"]["sha"]
+        parent = await self._json("GET", f"/repos/{repo}/git/commits/{parent_sha}", error)
+        
+        # One tree with every change on top of the parent's tree
+        tree = await self._json(
+            "POST",
+            f"/repos/{repo}/git/trees",
+            error,
+            json={
+                "base_tree": parent["tree"]["sha"],
+                "tree": [
+                    {"path": f["path"], "mode": "100644", "type": "blob", "content": f["content"]}
+                    for f in files
+                ],
+            }
+        )
+        commit = await self._json(
+            "POST",
+            f"/repos/{repo}/git/commits",
+            error,
+            json={"message": message, "tree": tree["sha"], "parents": [parent_sha]}
+        )
+        await self._json(
+            "PATCH",
+            f"/repos/{repo}/git/refs/heads/{quote(branch)}",
+            error,
+            json={"sha": commit["sha"]}
+        )
+        
+        # Blob SHAs for these paths changed
+        for f in files:
+            self._sha_cache.pop((repo, f["path"], branch), None)
+        
+        response_cache.invalidate_repo(repo)
+        logger.info(f"Committed {len(files)} file(s) to {repo} on branch '{branch}'")
+        return f"Committed {len(files)} file(s) in {commit['sha'][:7]} successfully"
+    
+    async def create_pull_request(
+        self,
+        repo: str,
+        title: str,
+        body: str,
+        head: str,
+        base: str = "main"
+    ) -> Dict[str, Any]:
+        """Create a pull request."""
+        pr = await self._json(
+            "POST",
+            f"/repos/{repo}/pulls",
+            "Failed to create pull request",
+            json={"title": title, "body": body, "head": head, "base": base}
+        )
+        
+        response_cache.invalidate_repo(repo)
+        logger.info(f"Created PR #{pr['number']} in {repo}")
+        return {
+            "number": pr["number"],
+            "url": pr["html_url"],
+        }
+    
+    async def get_issue(self, repo: str, issue_number: int) -> Dict[str, Any]:
+        """Get issue details along with the repository's default branch."""
+        owner, _, name = repo.partition("/")
+        data = await self._graphql(
+            repo,
+            _ISSUE_QUERY,
+            f"Failed to get issue #{issue_number}",
+            owner=owner,
+            name=name,
+            number=issue_number
+        )
+        
+        repository = data.get("repository")
+        issue = repository and repository.get("issueOrPullRequest")
+        if not issue:
+            raise ValueError(f"Failed to get issue #{issue_number}: not found in '{repo}'")
+        
+        default_branch = repository.get("defaultBranchRef") or {}
+        return {
+            "number": issue["number"],
+            "title": issue["title"],
+            "body": truncate_body(issue["body"]),
+            "state": issue["state"].lower(),
+            "labels": [label["name"] for label in issue["labels"]["nodes"]],
+            "user": (issue.get("author") or {}).get("login"),
+            "url": issue["url"],
+            "default_branch": default_branch.get("name"),
+        }
+    
+    async def bootstrap_context(self, repo: str, issue_number: int, ref: Optional[str] = None) -> Dict[str, Any]:
+        """Get issue details and the repository's top-level files concurrently."""
+        issue, files = await asyncio.gather(
+            self.get_issue(repo, issue_number),
+            self.list_files(repo, "", ref)
+        )
+        return {"issue": issue, "files": files}
@@ -1,5 +1,5 @@
 """Permission management for GitHub MCP tools."""
-from typing import List, Dict
+from typing import Dict, FrozenSet
 from enum import Enum
 
 
@@ -24,22 +24,22 @@ class AgentRole(str, Enum):
     ADMIN = "admin"
 
 
-# Role to permissions mapping
-ROLE_PERMISSIONS: Dict[AgentRole, List[Permission]] = {
-    AgentRole.READER: [
+# Role to permissions mapping (frozensets for O(1) membership checks)
+ROLE_PERMISSIONS: Dict[AgentRole, FrozenSet[Permission]] = {
+    AgentRole.READER: frozenset([
         Permission.READ_FILE,
         Permission.LIST_FILES,
         Permission.GET_ISSUE,
-    ],
-    AgentRole.CONTRIBUTOR: [
+    ]),
+    AgentRole.CONTRIBUTOR: frozenset([
         Permission.READ_FILE,
         Permission.LIST_FILES,
         Permission.GET_ISSUE,
         Permission.CREATE_BRANCH,
         Permission.UPDATE_FILE,
         Permission.CREATE_PR,
-    ],
-    AgentRole.MAINTAINER: [
+    ]),
+    AgentRole.MAINTAINER: frozenset([
         Permission.READ_FILE,
         Permission.LIST_FILES,
         Permission.GET_ISSUE,
@@ -49,8 +49,8 @@ ROLE_PERMISSIONS: Dict[AgentRole, List[Permission]] = {
         Permission.MERGE_PR,
         Permission.CREATE_ISSUE,
         Permission.ADD_LABEL,
-    ],
-    AgentRole.ADMIN: list(Permission),  # All permissions
+    ]),
+    AgentRole.ADMIN: frozenset(Permission),  # All permissions
 }
 
 
@@ -66,7 +66,7 @@ class PermissionManager:
     def has_permission(self, agent_id: str, permission: Permission) -> bool:
         """Check if an agent has a specific permission."""
         role = self.agent_roles.get(agent_id, AgentRole.READER)
-        allowed_permissions = ROLE_PERMISSIONS.get(role, [])
+        allowed_permissions = ROLE_PERMISSIONS.get(role, frozenset())
         return permission in allowed_permissions
     
     def check_permission(self, agent_id: str, permission: Permission) -> None:
@@ -81,7 +81,7 @@ class PermissionManager:
         """Set an agent's role."""
         self.agent_roles[agent_id] = role
     
-    def get_agent_permissions(self, agent_id: str) -> List[Permission]:
+    def get_agent_permissions(self, agent_id: str) -> FrozenSet[Permission]:
         """Get all permissions for an agent."""
         role = self.agent_roles.get(agent_id, AgentRole.READER)
-        return ROLE_PERMISSIONS.get(role, [])
+        return ROLE_PERMISSIONS.get(role, frozenset())
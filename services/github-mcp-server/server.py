@@ -1,8 +1,11 @@
 """GitHub MCP Server implementation."""
 import asyncio
+import contextlib
+import hmac
+import inspect
 import logging
 import os
-from typing import Any, Sequence
+from typing import Any, Awaitable, Callable, Dict, Sequence, Union
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
@@ -10,6 +13,7 @@ from pydantic import AnyUrl
 
 from auth import GitHubAppAuth
 from github_tools import GitHubTools
+from github_tools_async import AsyncGitHubTools, close_http_client
 from permissions import PermissionManager, Permission
 
 logging.basicConfig(level=logging.INFO)
@@ -18,202 +22,399 @@ logger = logging.getLogger(__name__)
 # Initialize server
 app = Server("github-mcp-server")
 
+# Tool backend: "async" (httpx, HTTP/2) or "pygithub" (synchronous, kept for rollback)
+GITHUB_TOOLS_BACKEND = os.getenv("GITHUB_TOOLS_BACKEND", "async").lower()
+
 # Global state
 github_auth: GitHubAppAuth = None
 permission_manager = PermissionManager()
 default_installation_id: int = None
+# Installation ID -> (token, tools); kept while the token is valid so caches and connections persist
+_tools_by_install: Dict[int, tuple[str, Union[AsyncGitHubTools, GitHubTools]]] = {}
+
+# Caps concurrent outbound GitHub calls across all tool invocations
+_gh_sem = asyncio.Semaphore(int(os.getenv("GH_CONCURRENCY", "16")))
+
+# Read requests currently being fetched, shared by concurrent identical calls
+_inflight: Dict[tuple, asyncio.Task] = {}
+
+
+async def coalesce(key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """Run a read once for all concurrent callers with the same key (single-flight)."""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one caller being cancelled doesn't cancel the fetch for the others
+    return await asyncio.shield(task)
 
 
-def get_github_tools(agent_id: str = "SimpleGitHubAgent") -> GitHubTools:
+async def run_tool(func: Callable[..., Any], **kwargs: Any) -> Any:
+    """Run a tool method under the concurrency limit, in a thread if it's blocking."""
+    async with _gh_sem:
+        if inspect.iscoroutinefunction(func):
+            return await func(**kwargs)
+        return await asyncio.to_thread(func, **kwargs)
+
+
+def get_github_tools(agent_id: str = "SimpleGitHubAgent") -> Union[AsyncGitHubTools, GitHubTools]:
     """Get GitHub tools instance for an agent."""
-    gh_client = github_auth.get_github_client(default_installation_id)
-    return GitHubTools(gh_client)
+    token = github_auth.get_installation_token(default_installation_id)
+    
+    cached = _tools_by_install.get(default_installation_id)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    
+    if GITHUB_TOOLS_BACKEND == "pygithub":
+        tools = GitHubTools(github_auth.get_github_client(default_installation_id))
+    else:
+        tools = AsyncGitHubTools(token)
+    _tools_by_install[default_installation_id] = (token, tools)
+    return tools
 
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    """List available GitHub tools."""
-    return [
-        Tool(
-            name="read_file",
-            description="Read a file from a GitHub repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repo": {
-                        "type": "string",
-                        "description": "Repository in format 'owner/repo'"
-                    },
-                    "path": {
-                        "type": "string",
-                        "description": "Path to the file"
-                    },
-                    "ref": {
-                        "type": "string",
-                        "description": "Branch, tag, or commit SHA (default: main)",
-                        "default": "main"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier for permission checking",
-                        "default": "SimpleGitHubAgent"
-                    }
+# Tool definitions are static, so build them once and hand back the same list
+_TOOLS: list[Tool] = [
+    Tool(
+        name="read_file",
+        description="Read a file from a GitHub repository",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'"
                 },
-                "required": ["repo", "path"]
-            }
-        ),
-        Tool(
-            name="list_files",
-            description="List files in a directory of a GitHub repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repo": {
-                        "type": "string",
-                        "description": "Repository in format 'owner/repo'"
-                    },
-                    "path": {
-                        "type": "string",
-                        "description": "Directory path (empty for root)",
-                        "default": ""
-                    },
-                    "ref": {
-                        "type": "string",
-                        "description": "Branch, tag, or commit SHA (default: main)",
-                        "default": "main"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier for permission checking",
-                        "default": "SimpleGitHubAgent"
-                    }
+                "path": {
+                    "type": "string",
+                    "description": "Path to the file"
                 },
-                "required": ["repo"]
-            }
-        ),
-        Tool(
-            name="create_branch",
-            description="Create a new branch in a GitHub repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repo": {
-                        "type": "string",
-                        "description": "Repository in format 'owner/repo'"
-                    },
-                    "branch_name": {
-                        "type": "string",
-                        "description": "Name for the new branch"
-                    },
-                    "from_ref": {
-                        "type": "string",
-                        "description": "Source branch/ref (default: main)",
-                        "default": "main"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier for permission checking",
-                        "default": "SimpleGitHubAgent"
-                    }
+                "ref": {
+                    "type": "string",
+                    "description": "Branch, tag, or commit SHA (default: main)",
+                    "default": "main"
                 },
-                "required": ["repo", "branch_name"]
-            }
-        ),
-        Tool(
-            name="update_file",
-            description="Create or update a file in a GitHub repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repo": {
-                        "type": "string",
-                        "description": "Repository in format 'owner/repo'"
-                    },
-                    "path": {
-                        "type": "string",
-                        "description": "Path to the file"
-                    },
-                    "content": {
-                        "type": "string",
-                        "description": "File content"
-                    },
-                    "message": {
-                        "type": "string",
-                        "description": "Commit message"
-                    },
-                    "branch": {
-                        "type": "string",
-                        "description": "Branch to commit to"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier for permission checking",
-                        "default": "SimpleGitHubAgent"
-                    }
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier for permission checking",
+                    "default": "SimpleGitHubAgent"
+                }
+            },
+            "required": ["repo", "path"]
+        }
+    ),
+    Tool(
+        name="read_files",
+        description="Read several files from a GitHub repository in one call",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'"
                 },
-                "required": ["repo", "path", "content", "message", "branch"]
-            }
-        ),
-        Tool(
-            name="create_pull_request",
-            description="Create a pull request in a GitHub repository",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repo": {
-                        "type": "string",
-                        "description": "Repository in format 'owner/repo'"
-                    },
-                    "title": {
-                        "type": "string",
-                        "description": "PR title"
-                    },
-                    "body": {
-                        "type": "string",
-                        "description": "PR description"
-                    },
-                    "head": {
-                        "type": "string",
-                        "description": "Branch containing changes"
-                    },
-                    "base": {
-                        "type": "string",
-                        "description": "Base branch (default: main)",
-                        "default": "main"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier for permission checking",
-                        "default": "SimpleGitHubAgent"
+                "paths": {
+                    "type": "array",
+                    "description": "Paths to the files",
+                    "items": {
+                        "type": "string"
                     }
                 },
-                "required": ["repo", "title", "body", "head"]
-            }
-        ),
-        Tool(
-            name="get_issue",
-            description="Get details of a GitHub issue",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repo": {
-                        "type": "string",
-                        "description": "Repository in format 'owner/repo'"
-                    },
-                    "issue_number": {
-                        "type": "integer",
-                        "description": "Issue number"
-                    },
-                    "agent_id": {
-                        "type": "string",
-                        "description": "Agent identifier for permission checking",
-                        "default": "SimpleGitHubAgent"
+                "ref": {
+                    "type": "string",
+                    "description": "Branch, tag, or commit SHA (default: main)",
+                    "default": "main"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier for permission checking",
+                    "default": "SimpleGitHubAgent"
+                }
+            },
+            "required": ["repo", "paths"]
+        }
+    ),
+    Tool(
+        name="list_files",
+        description="List files in a directory of a GitHub repository",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'"
+                },
+                "path": {
+                    "type": "string",
+                    "description": "Directory path (empty for root)",
+                    "default": ""
+                },
+                "ref": {
+                    "type": "string",
+                    "description": "Branch, tag, or commit SHA (default: main)",
+                    "default": "main"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier for permission checking",
+                    "default": "SimpleGitHubAgent"
+                }
+            },
+            "required": ["repo"]
+        }
+    ),
+    Tool(
+        name="create_branch",
+        description="Create a new branch in a GitHub repository",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'"
+                },
+                "branch_name": {
+                    "type": "string",
+                    "description": "Name for the new branch"
+                },
+                "from_ref": {
+                    "type": "string",
+                    "description": "Source branch/ref (default: main)",
+                    "default": "main"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier for permission checking",
+                    "default": "SimpleGitHubAgent"
+                }
+            },
+            "required": ["repo", "branch_name"]
+        }
+    ),
+    Tool(
+        name="update_file",
+        description="Create or update a file in a GitHub repository",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'"
+                },
+                "path": {
+                    "type": "string",
+                    "description": "Path to the file"
+                },
+                "content": {
+                    "type": "string",
+                    "description": "File content"
+                },
+                "message": {
+                    "type": "string",
+                    "description": "Commit message"
+                },
+                "branch": {
+                    "type": "string",
+                    "description": "Branch to commit to"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier for permission checking",
+                    "default": "SimpleGitHubAgent"
+                }
+            },
+            "required": ["repo", "path", "content", "message", "branch"]
+        }
+    ),
+    Tool(
+        name="commit_files",
+        description="Create or update multiple files in a single commit on a branch",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'"
+                },
+                "branch": {
+                    "type": "string",
+                    "description": "Branch to commit to"
+                },
+                "files": {
+                    "type": "array",
+                    "description": "Files to write",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "description": "Path to the file"
+                            },
+                            "content": {
+                                "type": "string",
+                                "description": "File content"
+                            }
+                        },
+                        "required": ["path", "content"]
                     }
                 },
-                "required": ["repo", "issue_number"]
-            }
-        ),
-    ]
+                "message": {
+                    "type": "string",
+                    "description": "Commit message"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier for permission checking",
+                    "default": "SimpleGitHubAgent"
+                }
+            },
+            "required": ["repo", "branch", "files", "message"]
+        }
+    ),
+    Tool(
+        name="create_pull_request",
+        description="Create a pull request in a GitHub repository",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'"
+                },
+                "title": {
+                    "type": "string",
+                    "description": "PR title"
+                },
+                "body": {
+                    "type": "string",
+                    "description": "PR description"
+                },
+                "head": {
+                    "type": "string",
+                    "description": "Branch containing changes"
+                },
+                "base": {
+                    "type": "string",
+                    "description": "Base branch (default: main)",
+                    "default": "main"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier for permission checking",
+                    "default": "SimpleGitHubAgent"
+                }
+            },
+            "required": ["repo", "title", "body", "head"]
+        }
+    ),
+    Tool(
+        name="get_issue",
+        description="Get details of a GitHub issue",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'"
+                },
+                "issue_number": {
+                    "type": "integer",
+                    "description": "Issue number"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier for permission checking",
+                    "default": "SimpleGitHubAgent"
+                }
+            },
+            "required": ["repo", "issue_number"]
+        }
+    ),
+    Tool(
+        name="bootstrap_context",
+        description="Get issue details and the repository's top-level files in one call",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repo": {
+                    "type": "string",
+                    "description": "Repository in format 'owner/repo'"
+                },
+                "issue_number": {
+                    "type": "integer",
+                    "description": "Issue number"
+                },
+                "ref": {
+                    "type": "string",
+                    "description": "Branch, tag, or commit SHA to list (default: repository default branch)"
+                },
+                "agent_id": {
+                    "type": "string",
+                    "description": "Agent identifier for permission checking",
+                    "default": "SimpleGitHubAgent"
+                }
+            },
+            "required": ["repo", "issue_number"]
+        }
+    ),
+]
+
+
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    """List available GitHub tools."""
+    return _TOOLS
+
+
+# Tool name -> (required permissions, coalesce concurrent calls?, arguments -> method kwargs).
+# Tool names match the GitHubTools/AsyncGitHubTools method names.
+_DISPATCH: Dict[str, tuple[tuple[Permission, ...], bool, Callable[[Dict[str, Any]], Dict[str, Any]]]] = {
+    "read_file": ((Permission.READ_FILE,), True, lambda a: {
+        "repo": a["repo"], "path": a["path"], "ref": a.get("ref", "main"),
+    }),
+    "read_files": ((Permission.READ_FILE,), True, lambda a: {
+        "repo": a["repo"], "paths": a["paths"], "ref": a.get("ref", "main"),
+    }),
+    "list_files": ((Permission.LIST_FILES,), True, lambda a: {
+        "repo": a["repo"], "path": a.get("path", ""), "ref": a.get("ref", "main"),
+    }),
+    "create_branch": ((Permission.CREATE_BRANCH,), False, lambda a: {
+        "repo": a["repo"], "branch_name": a["branch_name"], "from_ref": a.get("from_ref", "main"),
+    }),
+    "update_file": ((Permission.UPDATE_FILE,), False, lambda a: {
+        "repo": a["repo"], "path": a["path"], "content": a["content"],
+        "message": a["message"], "branch": a["branch"],
+    }),
+    "commit_files": ((Permission.UPDATE_FILE,), False, lambda a: {
+        "repo": a["repo"], "branch": a["branch"], "files": a["files"], "message": a["message"],
+    }),
+    "create_pull_request": ((Permission.CREATE_PR,), False, lambda a: {
+        "repo": a["repo"], "title": a["title"], "body": a["body"],
+        "head": a["head"], "base": a.get("base", "main"),
+    }),
+    "get_issue": ((Permission.GET_ISSUE,), True, lambda a: {
+        "repo": a["repo"], "issue_number": a["issue_number"],
+    }),
+    "bootstrap_context": ((Permission.GET_ISSUE, Permission.LIST_FILES), True, lambda a: {
+        "repo": a["repo"], "issue_number": a["issue_number"], "ref": a.get("ref"),
+    }),
+}
+
+
+def format_files(files: Dict[str, Any]) -> str:
+    """Render read_files output as raw file sections under a path header."""
+    sections = []
+    for path, content in files.items():
+        body = content if content is not None else "(missing, binary or too large to read)"
+        sections.append(f"=== {path} ===\n{body}")
+    return "\n\n".join(sections)
+
+
+# Tools whose results need more than str(); a repr would escape every newline and quote in file bodies
+_FORMATTERS: Dict[str, Callable[[Any], str]] = {
+    "read_files": format_files,
+}
 
 
 @app.call_tool()
@@ -222,67 +423,24 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent]:
     agent_id = arguments.get("agent_id", "SimpleGitHubAgent")
     
     try:
-        tools = get_github_tools(agent_id)
-        
-        if name == "read_file":
-            permission_manager.check_permission(agent_id, Permission.READ_FILE)
-            result = tools.read_file(
-                repo=arguments["repo"],
-                path=arguments["path"],
-                ref=arguments.get("ref", "main")
-            )
-            return [TextContent(type="text", text=result)]
-        
-        elif name == "list_files":
-            permission_manager.check_permission(agent_id, Permission.LIST_FILES)
-            result = tools.list_files(
-                repo=arguments["repo"],
-                path=arguments.get("path", ""),
-                ref=arguments.get("ref", "main")
-            )
-            return [TextContent(type="text", text=str(result))]
-        
-        elif name == "create_branch":
-            permission_manager.check_permission(agent_id, Permission.CREATE_BRANCH)
-            result = tools.create_branch(
-                repo=arguments["repo"],
-                branch_name=arguments["branch_name"],
-                from_ref=arguments.get("from_ref", "main")
-            )
-            return [TextContent(type="text", text=result)]
-        
-        elif name == "update_file":
-            permission_manager.check_permission(agent_id, Permission.UPDATE_FILE)
-            result = tools.update_file(
-                repo=arguments["repo"],
-                path=arguments["path"],
-                content=arguments["content"],
-                message=arguments["message"],
-                branch=arguments["branch"]
-            )
-            return [TextContent(type="text", text=result)]
-        
-        elif name == "create_pull_request":
-            permission_manager.check_permission(agent_id, Permission.CREATE_PR)
-            result = tools.create_pull_request(
-                repo=arguments["repo"],
-                title=arguments["title"],
-                body=arguments["body"],
-                head=arguments["head"],
-                base=arguments.get("base", "main")
-            )
-            return [TextContent(type="text", text=str(result))]
+        spec = _DISPATCH.get(name)
+        if spec is None:
+            raise ValueError(f"Unknown tool: {name}")
+        permissions, coalesced, get_kwargs = spec
+        for permission in permissions:
+            permission_manager.check_permission(agent_id, permission)
+        kwargs = get_kwargs(arguments)
         
-        elif name == "get_issue":
-            permission_manager.check_permission(agent_id, Permission.GET_ISSUE)
-            result = tools.get_issue(
-                repo=arguments["repo"],
-                issue_number=arguments["issue_number"]
-            )
-            return [TextContent(type="text", text=str(result))]
+        # Token refresh is a blocking API call, so resolve tools off the event loop
+        tools = await asyncio.to_thread(get_github_tools, agent_id)
+        func = getattr(tools, name)
         
+        if coalesced:
+            key = (name, *(tuple(v) if isinstance(v, list) else v for v in kwargs.values()))
+            result = await coalesce(key, lambda: run_tool(func, **kwargs))
         else:
-            raise ValueError(f"Unknown tool: {name}")
+            result = await run_tool(func, **kwargs)
+        return [TextContent(type="text", text=_FORMATTERS.get(name, str)(result))]
     
     except PermissionError as e:
         logger.error(f"Permission denied: {e}")
@@ -310,10 +468,57 @@ async def main():
     logger.info("Starting GitHub MCP Server...")
     logger.info(f"App ID: {app_id}")
     logger.info(f"Installation ID: {default_installation_id}")
+    logger.info(f"Tools backend: {GITHUB_TOOLS_BACKEND}")
     
     # Run server
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(read_stream, write_stream, app.create_initialization_options())
+    transport = os.getenv("MCP_TRANSPORT", "stdio").lower()
+    try:
+        if transport == "http":
+            await run_http()
+        else:
+            async with stdio_server() as (read_stream, write_stream):
+                await app.run(read_stream, write_stream, app.create_initialization_options())
+    finally:
+        await close_http_client()
+
+
+async def run_http():
+    """Serve MCP over Streamable HTTP so one long-lived server can be shared by workers."""
+    import uvicorn
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Mount
+    
+    # Every tool acts with the App's installation token, so callers must present the shared secret
+    auth_token = os.getenv("MCP_AUTH_TOKEN")
+    if not auth_token:
+        raise ValueError("MCP_AUTH_TOKEN must be set for the HTTP transport")
+    expected_auth = f"Bearer {auth_token}".encode()
+    
+    session_manager = StreamableHTTPSessionManager(app=app, stateless=True)
+    
+    async def handle_mcp(scope, receive, send):
+        headers = dict(scope.get("headers", []))
+        if not hmac.compare_digest(headers.get(b"authorization", b""), expected_auth):
+            response = PlainTextResponse("Unauthorized", status_code=401, headers={"WWW-Authenticate": "Bearer"})
+            await response(scope, receive, send)
+            return
+        await session_manager.handle_request(scope, receive, send)
+    
+    @contextlib.asynccontextmanager
+    async def lifespan(_):
+        async with session_manager.run():
+            yield
+    
+    http_app = Starlette(routes=[Mount("/mcp", app=handle_mcp)], lifespan=lifespan)
+    # Loopback by default; set MCP_HOST=0.0.0.0 only when workers reach it over a private network
+    host = os.getenv("MCP_HOST", "127.0.0.1")
+    port = int(os.getenv("MCP_PORT", "8000"))
+    logger.info(f"Serving MCP over HTTP on {host}:{port}")
+    
+    config = uvicorn.Config(http_app, host=host, port=port)
+    await uvicorn.Server(config).serve()
 
 
 if __name__ == "__main__":
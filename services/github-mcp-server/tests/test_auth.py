@@ -0,0 +1,62 @@
+"""Tests for GitHub App authentication."""
+import json
+from unittest import mock
+
+import pytest
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from auth import GitHubAppAuth
+
+
+@pytest.fixture(scope="module")
+def private_key() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+@pytest.fixture
+def github_api():
+    """Mock the GitHub API at the HTTP layer, answering the access token endpoint."""
+    calls = []
+
+    def send(adapter, request, **kwargs):
+        calls.append(request)
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        if request.method == "POST" and request.url.endswith("/app/installations/1/access_tokens"):
+            response.status_code = 201
+            body = {"token": f"ghs_token{len(calls)}", "expires_at": "2099-01-01T00:00:00Z"}
+        else:
+            response.status_code = 404
+            body = {"message": "Not Found"}
+        response._content = json.dumps(body).encode()
+        response.headers["Content-Type"] = "application/json"
+        return response
+
+    with mock.patch("requests.adapters.HTTPAdapter.send", autospec=True, side_effect=send):
+        yield calls
+
+
+def test_get_installation_token_uses_cached_jwt(private_key, github_api):
+    auth = GitHubAppAuth("123", private_key)
+
+    token = auth.get_installation_token(1)
+
+    assert token == "ghs_token1"
+    assert len(github_api) == 1
+    assert github_api[0].headers["Authorization"] == f"Bearer {auth.generate_jwt()}"
+
+
+def test_get_installation_token_is_cached(private_key, github_api):
+    auth = GitHubAppAuth("123", private_key)
+
+    assert auth.get_installation_token(1) == "ghs_token1"
+    assert auth.get_installation_token(1) == "ghs_token1"
+    assert len(github_api) == 1
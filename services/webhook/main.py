@@ -1,57 +1,63 @@
 """GitHub webhook receiver."""
+import asyncio
 import os
+import contextlib
 import hmac
-import hashlib
 import logging
-import sys
-from typing import Dict, Any
+import re
+import orjson
 from fastapi import FastAPI, Request, HTTPException, Response
-from pydantic import BaseModel
 
-# Add shared to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 from shared.queue import get_queue
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="SimpleGitHubAgent Webhook Service")
-
 # Initialize queue
 queue = get_queue()
 
 
-class WebhookPayload(BaseModel):
-    """GitHub webhook payload model."""
-    action: str
-    issue: Dict[str, Any] = None
-    comment: Dict[str, Any] = None
-    repository: Dict[str, Any]
-    installation: Dict[str, Any] = None
+@contextlib.asynccontextmanager
+async def lifespan(_):
+    """Connect to the queue at startup so the first webhook doesn't pay for the handshake."""
+    await queue.connect()
+    try:
+        yield
+    finally:
+        await queue.close()
+
+
+app = FastAPI(title="SimpleGitHubAgent Webhook Service", lifespan=lifespan)
+
+# Webhook secret, encoded once (empty disables verification, for testing)
+WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "").encode()
+_SIGNATURE_PREFIX = "sha256="
+# Payloads at least this large are verified off the event loop; smaller ones hash faster than a thread hop
+OFFLOAD_HMAC_BYTES = int(os.getenv("WEBHOOK_OFFLOAD_HMAC_BYTES", str(256 * 1024)))
+
+# First line starting with /agent (after indentation), found in one pass over the comment
+_COMMAND_RE = re.compile(r'(?m)^\s*(/agent[^\n]*)')
 
 
-def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
+def verify_signature(payload: bytes, signature: str) -> bool:
     """Verify GitHub webhook signature."""
-    if not signature:
+    if not signature.startswith(_SIGNATURE_PREFIX):
         return False
     
-    expected_signature = "sha256=" + hmac.new(
-        secret.encode(),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
+    try:
+        provided = bytes.fromhex(signature[len(_SIGNATURE_PREFIX):])
+    except ValueError:
+        return False
     
-    return hmac.compare_digest(expected_signature, signature)
+    # One-shot C HMAC (OpenSSL), compared as raw digests
+    expected = hmac.digest(WEBHOOK_SECRET, payload, "sha256")
+    return hmac.compare_digest(expected, provided)
 
 
 def parse_command(comment_body: str) -> str:
     """Extract agent command from comment."""
-    lines = comment_body.strip().split('\n')
-    for line in lines:
-        line = line.strip()
-        if line.startswith('/agent'):
-            return line
-    return ""
+    match = _COMMAND_RE.search(comment_body)
+    return match.group(1).rstrip() if match else ""
 
 
 @app.get("/")
@@ -67,26 +73,38 @@ async def health():
 
 
 @app.post("/webhook")
-async def webhook(request: Request):
+async def webhook(request: Request, response: Response):
     """Handle GitHub webhook events."""
     try:
+        event_type = request.headers.get("X-GitHub-Event", "")
+        
+        # Only issue comments can carry agent commands; acknowledge anything else
+        # without reading, verifying or parsing the body since it's never acted on
+        if event_type != "issue_comment":
+            response.status_code = 202
+            return {"status": "ignored", "message": f"Event '{event_type}' is not handled"}
+        
         # Get payload
         payload = await request.body()
         signature = request.headers.get("X-Hub-Signature-256", "")
-        event_type = request.headers.get("X-GitHub-Event", "")
         
-        # Verify signature (optional for testing)
-        webhook_secret = os.getenv("GITHUB_WEBHOOK_SECRET", "")
-        if webhook_secret and not verify_signature(payload, signature, webhook_secret):
-            raise HTTPException(status_code=401, detail="Invalid signature")
+        # Verify signature (optional for testing); hashing large bodies in a thread
+        # keeps the event loop free to accept other deliveries (hashlib releases the GIL)
+        if WEBHOOK_SECRET:
+            if len(payload) >= OFFLOAD_HMAC_BYTES:
+                valid = await asyncio.to_thread(verify_signature, payload, signature)
+            else:
+                valid = verify_signature(payload, signature)
+            if not valid:
+                raise HTTPException(status_code=401, detail="Invalid signature")
         
-        # Parse payload
-        data = await request.json()
+        # Parse the body we already read (request.json() would decode it again with stdlib json)
+        data = orjson.loads(payload)
         
         logger.info(f"Received {event_type} event")
         
         # Handle issue_comment events
-        if event_type == "issue_comment" and data.get("action") == "created":
+        if data.get("action") == "created":
             comment_body = data["comment"]["body"]
             command = parse_command(comment_body)
             
@@ -103,9 +121,8 @@ async def webhook(request: Request):
                 logger.info(f"Agent command detected: {command}")
                 logger.info(f"Processing request for {request_data['repository']} issue #{request_data['issue_number']}")
                 
-                # Publish to queue (async processing)
-                import asyncio
-                asyncio.create_task(queue.publish(request_data))
+                # Publish before acknowledging so a failed publish surfaces as a 500
+                await queue.publish(request_data)
                 
                 return {"status": "accepted", "message": "Agent is processing your request"}
         
@@ -119,4 +136,11 @@ async def webhook(request: Request):
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", "8080"))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # uvicorn[standard] brings uvloop and httptools, which uvicorn picks up automatically
+    # (uvloop is skipped on Windows); several worker processes spread HMAC/JSON work across cores
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=int(os.getenv("WEB_CONCURRENCY", "2"))
+    )
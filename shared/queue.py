@@ -1,13 +1,31 @@
 """Message queue abstraction that works with Redis or Google Pub/Sub."""
 import os
-import json
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable
 import asyncio
+import msgpack
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Publishes arriving within this window are sent to Redis in a single RPUSH
+REDIS_PUBLISH_WINDOW = float(os.getenv("REDIS_PUBLISH_WINDOW_MS", "5")) / 1000
+# Most messages taken from Redis per round trip when subscribing
+REDIS_SUBSCRIBE_BATCH = int(os.getenv("REDIS_SUBSCRIBE_BATCH", "32"))
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    """Serialize a queue message as MessagePack (smaller and cheaper to parse than JSON)."""
+    return msgpack.packb(message, use_bin_type=True)
+
+
+def _decode(data: bytes) -> Dict[str, Any]:
+    """Deserialize a queue message, still accepting JSON left by older publishers."""
+    if data[:1] == b"{":
+        return orjson.loads(data)
+    return msgpack.unpackb(data, raw=False)
+
 
 class MessageQueue(ABC):
     """Abstract message queue interface."""
@@ -22,6 +40,10 @@ class MessageQueue(ABC):
         """Subscribe to messages and process them with callback."""
         pass
     
+    async def connect(self) -> None:
+        """Open the connection ahead of the first publish/subscribe."""
+        pass
+    
     @abstractmethod
     async def close(self) -> None:
         """Close the queue connection."""
@@ -36,38 +58,73 @@ class RedisQueue(MessageQueue):
         self.queue_name = queue_name
         self.redis = None
         self._running = False
+        # Serialized messages waiting for the next flush, and the task that will send them
+        self._pending: List[bytes] = []
+        self._flush_task: Optional[asyncio.Task] = None
     
-    async def _connect(self):
+    async def connect(self) -> None:
         """Connect to Redis."""
         if self.redis is None:
             import redis.asyncio as redis
-            self.redis = await redis.from_url(self.redis_url, decode_responses=True)
+            self.redis = await redis.from_url(self.redis_url)
+            # from_url only builds the pool; ping opens (and authenticates) a real connection
+            await self.redis.ping()
     
     async def publish(self, message: Dict[str, Any]) -> None:
-        """Publish a message to Redis list."""
-        await self._connect()
-        message_json = json.dumps(message)
-        await self.redis.rpush(self.queue_name, message_json)
-        logger.info(f"Published message to Redis queue: {self.queue_name}")
+        """Publish a message to Redis list, batched with concurrent publishes."""
+        await self.connect()
+        self._pending.append(_encode(message))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+        # Shield so one cancelled publisher doesn't drop the whole batch
+        await asyncio.shield(self._flush_task)
+    
+    async def _flush(self) -> None:
+        """Push every message buffered during the publish window in one round trip."""
+        await asyncio.sleep(REDIS_PUBLISH_WINDOW)
+        pending, self._pending = self._pending, []
+        self._flush_task = None
+        await self.redis.rpush(self.queue_name, *pending)
+        logger.info(f"Published {len(pending)} message(s) to Redis queue: {self.queue_name}")
     
     async def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
         """Subscribe to Redis list and process messages."""
-        await self._connect()
+        from redis.exceptions import ResponseError
+        
+        await self.connect()
         self._running = True
         logger.info(f"Subscribed to Redis queue: {self.queue_name}")
         
+        # BLMPOP (Redis >= 7) drains a backlog in batches; older servers get one BLPOP per message
+        use_blmpop = True
         while self._running:
             try:
                 # Block for 1 second waiting for messages
-                result = await self.redis.blpop(self.queue_name, timeout=1)
-                if result:
-                    _, message_json = result
-                    message = json.loads(message_json)
-                    logger.info(f"Received message from Redis: {message}")
-                    await callback(message)
+                if use_blmpop:
+                    try:
+                        result = await self.redis.blmpop(
+                            1, 1, self.queue_name, direction="LEFT", count=REDIS_SUBSCRIBE_BATCH
+                        )
+                        batch = result[1] if result else []
+                    except ResponseError:
+                        logger.info("BLMPOP not supported by this Redis server, falling back to BLPOP")
+                        use_blmpop = False
+                        continue
+                else:
+                    result = await self.redis.blpop(self.queue_name, timeout=1)
+                    batch = [result[1]] if result else []
             except Exception as e:
-                logger.error(f"Error processing Redis message: {e}", exc_info=True)
+                logger.error(f"Error reading from Redis: {e}", exc_info=True)
                 await asyncio.sleep(1)
+                continue
+            
+            for message_data in batch:
+                try:
+                    message = _decode(message_data)
+                    logger.info(f"Received message from Redis: {message}")
+                    await callback(message)
+                except Exception as e:
+                    logger.error(f"Error processing Redis message: {e}", exc_info=True)
     
     async def close(self) -> None:
         """Close Redis connection."""
@@ -87,18 +144,28 @@ class PubSubQueue(MessageQueue):
         self.subscriber = None
         self._running = False
     
+    async def connect(self) -> None:
+        """Create the publisher client (its gRPC channel setup blocks, so off the event loop)."""
+        if self.publisher is None:
+            from google.cloud import pubsub_v1
+            # Concurrent publishes within 10ms are combined into a single RPC
+            batch_settings = pubsub_v1.types.BatchSettings(
+                max_messages=100,
+                max_bytes=1 << 20,
+                max_latency=0.01
+            )
+            self.publisher = await asyncio.to_thread(pubsub_v1.PublisherClient, batch_settings=batch_settings)
+    
     async def publish(self, message: Dict[str, Any]) -> None:
         """Publish a message to Pub/Sub."""
-        from google.cloud import pubsub_v1
-        
-        if self.publisher is None:
-            self.publisher = pubsub_v1.PublisherClient()
+        await self.connect()
         
         topic_path = self.publisher.topic_path(self.project_id, self.topic_name)
-        message_json = json.dumps(message).encode("utf-8")
+        message_data = _encode(message)
         
-        future = self.publisher.publish(topic_path, message_json)
-        future.result()  # Wait for publish to complete
+        future = self.publisher.publish(topic_path, message_data)
+        # Wait for the publish without blocking the event loop
+        await asyncio.wrap_future(future)
         logger.info(f"Published message to Pub/Sub topic: {self.topic_name}")
     
     async def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
@@ -112,7 +179,7 @@ class PubSubQueue(MessageQueue):
         
         def _callback(message):
             try:
-                data = json.loads(message.data.decode("utf-8"))
+                data = _decode(message.data)
                 logger.info(f"Received message from Pub/Sub: {data}")
                 asyncio.create_task(callback(data))
                 message.ack()